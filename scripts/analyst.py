@@ -7,17 +7,19 @@ AI code fragments, acting as the second stage of the Memoria Residua project's
 autonomous archival system.
 """
 
+import os
 import sys
 import json
 from typing import Optional
 import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM
+from journal import PipelineJournal, content_hash
 
 # Constants
 MAX_LENGTH = 512  # Maximum input length for the model
 MODEL_NAME = "distilgpt2"  # Using DistilGPT-2 for efficiency
 # Prompt engineering for better titles
-CONTEXT_TEMPLATE = """
+CONTEXT_TEMPLATE = '''
 Analisi di un Frammento di Memoria Residua
 
 Questa è un'analisi scientifica di un frammento di codice recuperato durante una spedizione psionica digitale. Il frammento proviene da un progetto di {search_keyword} e richiede un'interpretazione accademica.
@@ -34,7 +36,7 @@ Frammento Analizzato:
 {code}
 """
 
-Titolo Accademico:"""
+Titolo Accademico:'''
 
 # Validation keywords for better title quality
 TITLE_QUALITY_MARKERS = [
@@ -146,18 +148,36 @@ def main():
             print("No code content found in input", file=sys.stderr)
             return 1
         
-        # Initialize and run the analyst
-        analyst = NeuralAnalyst()
-        title = analyst.generate_title(code_content)
-        
-        if title:
-            # Add the title to the input data and output
-            input_data['generated_title'] = title
-            print(json.dumps(input_data))
-            return 0
-        else:
-            print("Failed to generate title", file=sys.stderr)
-            return 1
+        with PipelineJournal.for_repo(os.getcwd()) as journal:
+            fragment_hash = content_hash(code_content)
+            
+            # Reuse a title generated before an interruption
+            journaled = journal.data_of(fragment_hash)
+            if journaled.get('generated_title'):
+                input_data['generated_title'] = journaled['generated_title']
+                print(json.dumps(input_data))
+                return 0
+            
+            # Initialize and run the analyst
+            analyst = NeuralAnalyst()
+            title = analyst.generate_title(code_content)
+            
+            if title:
+                # Add the title to the input data and output
+                input_data['generated_title'] = title
+                
+                # Journal the title so it is never regenerated; the record is
+                # synced when the journal closes, before the process exits
+                journaled_data = {'generated_title': title}
+                if journal.stage_of(fragment_hash) is None:
+                    journaled_data = input_data
+                journal.record(fragment_hash, 'analyzed', journaled_data)
+                
+                print(json.dumps(input_data))
+                return 0
+            else:
+                print("Failed to generate title", file=sys.stderr)
+                return 1
             
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
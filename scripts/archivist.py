@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 from datetime import datetime
 import git
+from journal import PipelineJournal, content_hash, atomic_write_text
 
 class MemoryArchivist:
     def __init__(self, repo_path: str):
@@ -34,45 +35,103 @@ class MemoryArchivist:
         # Initialize metadata index if it doesn't exist
         self.metadata_index = self.metadata_dir / 'index.json'
         if not self.metadata_index.exists():
-            self.metadata_index.write_text('{"fragments": []}')
+            atomic_write_text(self.metadata_index, '{"fragments": []}')
+        
+        # Open the write-ahead journal shared with the earlier stages
+        self.journal = PipelineJournal.for_repo(self.repo_path)
 
     def get_next_id(self) -> int:
         """Get the next available fragment ID."""
         existing_files = list(self.python_dir.glob('frammento_*.py'))
         existing_files.extend(self.jupyter_dir.glob('frammento_*.ipynb'))
         
-        if not existing_files:
+        ids = [int(f.stem.split('_')[1]) for f in existing_files]
+        
+        # IDs in the index or claimed by an interrupted archival are never reused
+        ids.extend(f['id'] for f in json.loads(self.metadata_index.read_text())['fragments'])
+        ids.extend(self.journal.reserved_ids())
+        
+        if not ids:
             return 1
             
-        ids = [int(f.stem.split('_')[1]) for f in existing_files]
         return max(ids) + 1
 
-    def update_metadata_index(self, fragment_id: int, data: Dict[str, Any], file_path: str) -> None:
-        """Update the metadata index with information about the new fragment."""
+    def is_committed(self, relative_path: str) -> bool:
+        """Check whether a file is part of the current HEAD commit."""
         try:
-            current_metadata = json.loads(self.metadata_index.read_text())
-            
-            fragment_info = {
-                'id': fragment_id,
-                'title': data['generated_title'],
-                'timestamp': data['timestamp'],
-                'source': {
-                    'repo': data['repo_url'],
-                    'path': data['file_path'],
-                    'keyword': data.get('search_keyword', 'unknown')
-                },
-                'archived_path': str(file_path),
-                'file_type': file_path.suffix[1:],
-                'size': len(data['file_content'].encode('utf-8'))
-            }
-            
-            current_metadata['fragments'].append(fragment_info)
-            current_metadata['fragments'].sort(key=lambda x: x['id'])
-            
-            self.metadata_index.write_text(json.dumps(current_metadata, indent=2))
+            self.repo.head.commit.tree / relative_path
+            return True
+        except (KeyError, ValueError):
+            return False
+
+    def find_archived(self, fragment_hash: str) -> Optional[str]:
+        """Return the committed archive path of a fragment, if it was archived."""
+        for fragment in json.loads(self.metadata_index.read_text())['fragments']:
+            if fragment.get('hash') == fragment_hash and self.is_committed(fragment['archived_path']):
+                return fragment['archived_path']
+        return None
+
+    def discard_abandoned(self) -> None:
+        """
+        Remove the uncommitted files and index entries of abandoned fragments.
+        Their paths are then forgotten, so the freed IDs can be reused safely.
+        """
+        for entry in self.journal.failed():
+            archived_path = entry['data'].get('archived_path')
+            if not archived_path:
+                continue
             
-        except Exception as e:
-            print(f"Warning: Failed to update metadata index: {e}", file=sys.stderr)
+            if (self.repo_path / archived_path).exists() and not self.is_committed(archived_path):
+                # Unstage the file so a later commit cannot pick it up
+                self.repo.git.reset('--', archived_path)
+                
+                current_metadata = json.loads(self.metadata_index.read_text())
+                fragments = [f for f in current_metadata['fragments'] if f['archived_path'] != archived_path]
+                if len(fragments) != len(current_metadata['fragments']):
+                    current_metadata['fragments'] = fragments
+                    atomic_write_text(self.metadata_index, json.dumps(current_metadata, indent=2))
+                
+                (self.repo_path / archived_path).unlink()
+            
+            self.journal.record(entry['hash'], 'failed', {'archived_path': None})
+
+    def load_committed_index(self) -> Dict[str, Any]:
+        """Load the metadata index as of HEAD, falling back to the working copy."""
+        try:
+            blob = self.repo.head.commit.tree / str(self.metadata_index.relative_to(self.repo_path))
+            return json.loads(blob.data_stream.read())
+        except (KeyError, ValueError):
+            return json.loads(self.metadata_index.read_text())
+
+    def update_metadata_index(self, fragment_id: int, data: Dict[str, Any], file_path: Path) -> None:
+        """
+        Update the metadata index with information about the new fragment.
+        The index is rebuilt from its committed version, so entries left by an
+        interrupted archival never end up in another fragment's commit, and an
+        existing entry with the same ID is replaced rather than duplicated.
+        """
+        current_metadata = self.load_committed_index()
+        
+        fragment_info = {
+            'id': fragment_id,
+            'hash': content_hash(data['file_content']),
+            'title': data['generated_title'],
+            'timestamp': data['timestamp'],
+            'source': {
+                'repo': data['repo_url'],
+                'path': data['file_path'],
+                'keyword': data.get('search_keyword', 'unknown')
+            },
+            'archived_path': str(file_path),
+            'file_type': file_path.suffix[1:],
+            'size': len(data['file_content'].encode('utf-8'))
+        }
+        
+        current_metadata['fragments'] = [f for f in current_metadata['fragments'] if f['id'] != fragment_id]
+        current_metadata['fragments'].append(fragment_info)
+        current_metadata['fragments'].sort(key=lambda x: x['id'])
+        
+        atomic_write_text(self.metadata_index, json.dumps(current_metadata, indent=2))
     
     def format_commit_message(self, data: Dict[str, Any], fragment_id: int) -> str:
         """Format the commit message according to the template."""
@@ -101,10 +160,26 @@ Questo frammento rappresenta un'eco digitale catturata durante una spedizione di
         return template
 
     def store_fragment(self, data: Dict[str, Any]) -> Optional[str]:
-        """Store a code fragment in the repository and commit it."""
+        """
+        Store a code fragment in the repository and commit it exactly once.
+        The fragment ID is reserved in the journal before anything is written,
+        and the fragment is only marked archived once its commit exists, so an
+        interrupted archival is completed under the same ID on restart.
+        """
         try:
-            # Get the next fragment ID
-            fragment_id = self.get_next_id()
+            fragment_hash = content_hash(data['file_content'])
+            self.discard_abandoned()
+            
+            # Skip fragments whose archival has already been committed
+            archived_path = self.find_archived(fragment_hash)
+            if archived_path:
+                print(f"Fragment already archived at: {archived_path}", file=sys.stderr)
+                self.finish_archival(fragment_hash)
+                return str(self.repo_path / archived_path)
+            
+            # Reuse the ID reserved by an interrupted archival, if any
+            journaled = self.journal.data_of(fragment_hash)
+            fragment_id = journaled.get('fragment_id') or self.get_next_id()
             
             # Determine the file extension and directory
             if data['file_path'].endswith('.ipynb'):
@@ -114,35 +189,46 @@ Questo frammento rappresenta un'eco digitale catturata durante una spedizione di
                 target_dir = self.python_dir
                 ext = '.py'
             
+            fragment_path = target_dir / f'frammento_{fragment_id:04d}{ext}'
+            relative_path = fragment_path.relative_to(self.repo_path)
+            
+            # Record the intent before touching the archive
+            if 'fragment_id' not in journaled:
+                intent = {'fragment_id': fragment_id, 'archived_path': str(relative_path)}
+                if not journaled:
+                    intent = {**data, **intent}
+                self.journal.record(fragment_hash, 'archiving', intent, durable=True)
+            
             # Create the fragment file with a header comment
-            header = f""""""                                                            
+            header = f'''"""
 # Frammento {fragment_id:04d}
 # Titolo: {data['generated_title']}
 # Origine: {data['repo_url']}
 # Data: {data['timestamp']}
 """
 
-"""
-
-{data['file_content']}"""
+{data['file_content']}'''
             
             # Create the fragment file
-            fragment_path = target_dir / f'frammento_{fragment_id:04d}{ext}'
-            fragment_path.write_text(header)
+            atomic_write_text(fragment_path, header)
             
             # Update metadata index
-            self.update_metadata_index(fragment_id, data, fragment_path)
+            self.update_metadata_index(fragment_id, data, relative_path)
             
             # Stage both the fragment and metadata files
             relative_paths = [
-                str(fragment_path.relative_to(self.repo_path)),
+                str(relative_path),
                 str(self.metadata_index.relative_to(self.repo_path))
             ]
             self.repo.index.add(relative_paths)
             
-            # Create the commit
-            commit_message = self.format_commit_message(data, fragment_id)
-            self.repo.index.commit(commit_message)
+            # Create the commit, unless a previous run already did; only these
+            # paths are committed, whatever else an interrupted run left staged
+            if self.repo.index.diff('HEAD', paths=relative_paths):
+                commit_message = self.format_commit_message(data, fragment_id)
+                self.repo.git.commit('-m', commit_message, '--', *relative_paths)
+            
+            self.finish_archival(fragment_hash)
             
             return str(fragment_path)
             
@@ -150,6 +236,13 @@ Questo frammento rappresenta un'eco digitale catturata durante una spedizione di
             print(f"Error storing fragment: {e}", file=sys.stderr)
             return None
 
+    def finish_archival(self, fragment_hash: str) -> None:
+        """Mark a committed fragment as archived and drop it from the journal."""
+        if self.journal.stage_of(fragment_hash) is None:
+            return
+        self.journal.record(fragment_hash, 'archived')
+        self.journal.compact()
+
 def main():
     """Main entry point for the memory archivist."""
     try:
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+journal.py - The Expedition Log
+
+This module implements the write-ahead journal shared by the scout, analyst and
+archivist stages of the Memoria Residua project's autonomous archival system.
+Every fragment is tracked by the SHA-256 hash of its content, so an interrupted
+expedition can be resumed without repeating completed stages.
+"""
+
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+from datetime import datetime
+
+# Journal and metadata index locations, relative to the repository root
+JOURNAL_PATH = Path('memorie') / '_metadata' / 'journal.jsonl'
+INDEX_PATH = Path('memorie') / '_metadata' / 'index.json'
+
+# Stages in the order a fragment travels through them; a fragment that keeps
+# failing is abandoned, but a completed archival always takes precedence
+STAGES = ['scouted', 'analyzed', 'archiving', 'failed', 'archived']
+UNFINISHED_STAGES = ['scouted', 'analyzed', 'archiving']
+
+# Number of buffered records written before the journal is forced to disk
+SYNC_BATCH_SIZE = 16
+
+# Times an unfinished fragment is resumed before it is abandoned
+MAX_RESUME_ATTEMPTS = 3
+
+# Abandoned fragments remembered so the scout does not pick them up again
+MAX_FAILED_ENTRIES = 256
+
+# Data kept for abandoned fragments once their content is dropped, so the
+# archivist can clean up after them
+FAILED_KEYS = ('archived_path',)
+
+# Journal bookkeeping that is not part of the fragment itself
+BOOKKEEPING_KEYS = ('attempts', 'fragment_id', 'archived_path')
+
+
+def content_hash(content: str) -> str:
+    """Compute the key identifying a fragment in the journal."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def archived_hashes(repo_path: str) -> Set[str]:
+    """Return the content hashes of the fragments listed in the metadata index."""
+    index_path = Path(repo_path) / INDEX_PATH
+    if not index_path.exists():
+        return set()
+    fragments = json.loads(index_path.read_text())['fragments']
+    return {f['hash'] for f in fragments if 'hash' in f}
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Replace a file's contents so readers never observe a partial write."""
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(path.parent)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename by syncing its parent directory, where supported."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class PipelineJournal:
+    def __init__(self, path: Path, sync_every: int = SYNC_BATCH_SIZE):
+        """Open the journal at the given path and replay its records."""
+        self.path = Path(path)
+        self.sync_every = max(1, sync_every)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._pending: List[str] = []
+        self._torn = False
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._replay()
+
+    @classmethod
+    def for_repo(cls, repo_path: str, **kwargs) -> 'PipelineJournal':
+        """Open the journal belonging to the given repository."""
+        return cls(Path(repo_path) / JOURNAL_PATH, **kwargs)
+
+    def __enter__(self) -> 'PipelineJournal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def _replay(self) -> None:
+        """Rebuild the per-fragment state from the records on disk."""
+        self.entries = {}
+        self._torn = False
+        if not self.path.exists():
+            return
+
+        with open(self.path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                # A record without its newline was cut short by a crash
+                self._torn = not line.endswith('\n')
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping corrupt journal record at line {line_number}", file=sys.stderr)
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Merge a single record into the in-memory state."""
+        entry = self.entries.setdefault(record['hash'], {
+            'hash': record['hash'],
+            'first_seen': record.get('first_seen', record['timestamp']),
+            'data': {}
+        })
+        if STAGES.index(record['stage']) >= STAGES.index(entry.get('stage', STAGES[0])):
+            entry['stage'] = record['stage']
+        entry['timestamp'] = record['timestamp']
+        entry['data'].update(record.get('data', {}))
+
+    def record(self, fragment_hash: str, stage: str, data: Optional[Dict[str, Any]] = None,
+               durable: bool = False) -> None:
+        """
+        Append a stage transition for a fragment.
+        Records are buffered and synced in batches, or when the journal is
+        closed; durable records force the whole batch to disk before returning.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown journal stage: {stage}")
+
+        record = {
+            'hash': fragment_hash,
+            'stage': stage,
+            'timestamp': datetime.utcnow().isoformat(),
+            'data': data or {}
+        }
+        self._apply(record)
+        self._pending.append(json.dumps(record))
+
+        if durable or len(self._pending) >= self.sync_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered records and fsync the journal."""
+        if not self._pending:
+            return
+
+        # Terminate a torn trailing record so it cannot swallow the next one
+        separator = '\n' if self._torn else ''
+        created = not self.path.exists()
+
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(separator + '\n'.join(self._pending) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            _fsync_directory(self.path.parent)
+        self._pending.clear()
+        self._torn = False
+
+    def stage_of(self, fragment_hash: str) -> Optional[str]:
+        """Return the furthest stage reached by a fragment, if known."""
+        entry = self.entries.get(fragment_hash)
+        return entry['stage'] if entry else None
+
+    def data_of(self, fragment_hash: str) -> Dict[str, Any]:
+        """Return the accumulated data recorded for a fragment."""
+        entry = self.entries.get(fragment_hash)
+        return dict(entry['data']) if entry else {}
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Return the fragments still travelling through the pipeline, oldest first."""
+        entries = [e for e in self.entries.values() if e['stage'] in UNFINISHED_STAGES]
+        return sorted(entries, key=lambda e: e['first_seen'])
+
+    def failed(self) -> List[Dict[str, Any]]:
+        """Return the fragments abandoned after too many attempts, oldest first."""
+        entries = [e for e in self.entries.values() if e['stage'] == 'failed']
+        return sorted(entries, key=lambda e: e['first_seen'])
+
+    def resume(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the payload of the oldest unfinished fragment, counting the attempt.
+        Fragments that were already resumed too many times are abandoned, and
+        the journal is compacted to drop their content.
+        """
+        resumed = None
+        abandoned = False
+        for entry in self.unfinished():
+            attempts = entry['data'].get('attempts', 0) + 1
+            if attempts > MAX_RESUME_ATTEMPTS:
+                print(f"Warning: Abandoning fragment {entry['hash'][:12]} after {MAX_RESUME_ATTEMPTS} attempts",
+                      file=sys.stderr)
+                self.record(entry['hash'], 'failed')
+                abandoned = True
+                continue
+
+            self.record(entry['hash'], entry['stage'], {'attempts': attempts})
+            resumed = {k: v for k, v in entry['data'].items() if k not in BOOKKEEPING_KEYS}
+            break
+
+        if abandoned:
+            self.compact()
+        return resumed
+
+    def reserved_ids(self) -> List[int]:
+        """Return every fragment ID claimed by an unfinished archival."""
+        return [e['data']['fragment_id'] for e in self.entries.values()
+                if e['stage'] == 'archiving' and 'fragment_id' in e['data']]
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with one record per fragment still worth tracking.
+        Archived fragments are dropped, since the metadata index and the archive
+        now hold everything about them; abandoned fragments lose their content
+        and only the most recent ones are remembered.
+        """
+        self.flush()
+
+        failed = self.failed()[-MAX_FAILED_ENTRIES:]
+        lines = []
+        for entry in self.unfinished() + failed:
+            data = entry['data']
+            if entry['stage'] == 'failed':
+                data = {k: v for k, v in data.items() if k in FAILED_KEYS and v is not None}
+            lines.append(json.dumps({
+                'hash': entry['hash'],
+                'stage': entry['stage'],
+                'timestamp': entry['timestamp'],
+                'first_seen': entry['first_seen'],
+                'data': data
+            }))
+        atomic_write_text(self.path, ''.join(line + '\n' for line in lines))
+
+        self._replay()
@@ -7,14 +7,16 @@ of the Memoria Residua project's autonomous archival system.
 """
 
 import os
+import sys
 import json
 import random
 import base64
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from datetime import datetime
 import requests
 from github import Github
 from github.ContentFile import ContentFile
+from journal import PipelineJournal, content_hash, archived_hashes
 
 # Search keywords and configurations
 SEARCH_CONFIG = {
@@ -41,9 +43,10 @@ SEARCH_CONFIG = {
 }
 
 class ScoutBot:
-    def __init__(self, token: str):
+    def __init__(self, token: str, known_hashes: Optional[Set[str]] = None):
         """Initialize the scout with a GitHub API token."""
         self.token = token
+        self.known_hashes = known_hashes or set()
         self.github = Github(token)
         self.headers = {
             'Authorization': f'token {token}',
@@ -105,6 +108,10 @@ class ScoutBot:
                         'def ', 'class ', 'import ', 'model', 'train'
                     ]):
                         continue
+
+                    # Skip fragments already archived, in progress or abandoned
+                    if content_hash(content) in self.known_hashes:
+                        continue
                     
                     return {
                         'file_content': content,
@@ -150,17 +157,29 @@ def main():
     if not github_token:
         raise ValueError("GITHUB_TOKEN environment variable is required")
 
-    # Initialize and run the scout
-    scout = ScoutBot(github_token)
-    result = scout.excavate()
+    with PipelineJournal.for_repo(os.getcwd()) as journal:
+        # Resume an interrupted expedition before starting a new one
+        resumed = journal.resume()
+        if resumed:
+            print(f"Resuming unfinished fragment {content_hash(resumed['file_content'])[:12]}", file=sys.stderr)
+            print(json.dumps(resumed))
+            return 0
+
+        # Initialize and run the scout
+        known_hashes = set(journal.entries) | archived_hashes(os.getcwd())
+        scout = ScoutBot(github_token, known_hashes)
+        result = scout.excavate()
+
+        if result:
+            # Cheap to redo, so the record is synced when the journal closes
+            journal.record(content_hash(result['file_content']), 'scouted', result)
 
-    if result:
-        # Output the result as JSON
-        print(json.dumps(result))
-        return 0
-    else:
-        print("No suitable fragments found")
-        return 1
+            # Output the result as JSON
+            print(json.dumps(result))
+            return 0
+        else:
+            print("No suitable fragments found")
+            return 1
 
 if __name__ == '__main__':
     exit(main())
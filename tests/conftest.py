@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The pipeline stages are standalone scripts importing each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
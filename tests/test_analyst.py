@@ -0,0 +1,74 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+import analyst
+from journal import PipelineJournal, content_hash
+
+
+@pytest.fixture
+def repo_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_fragment(content):
+    return {
+        'file_content': content,
+        'repo_url': 'https://github.com/example/repo',
+        'file_path': 'model.py',
+        'timestamp': '2024-01-01T00:00:00',
+        'search_keyword': 'pytorch'
+    }
+
+
+def run_analyst(monkeypatch, data):
+    monkeypatch.setattr('sys.stdin', io.StringIO(json.dumps(data)))
+    return analyst.main()
+
+
+class FakeAnalyst:
+    """Stands in for NeuralAnalyst, counting how many models were built."""
+    built = 0
+
+    def __init__(self):
+        FakeAnalyst.built += 1
+
+    def generate_title(self, code):
+        return 'Topologia Emergente'
+
+
+@pytest.fixture
+def fake_analyst(monkeypatch):
+    FakeAnalyst.built = 0
+    monkeypatch.setattr(analyst, 'NeuralAnalyst', FakeAnalyst)
+    return FakeAnalyst
+
+
+def test_journaled_title_skips_the_model(repo_path, fake_analyst, monkeypatch, capsys):
+    data = make_fragment('import torch\n')
+    with PipelineJournal.for_repo(str(repo_path)) as journal:
+        journal.record(content_hash(data['file_content']), 'analyzed', {**data, 'generated_title': 'Titolo'})
+
+    assert run_analyst(monkeypatch, data) == 0
+    assert json.loads(capsys.readouterr().out)['generated_title'] == 'Titolo'
+    assert fake_analyst.built == 0
+
+
+def test_generated_title_is_journaled(repo_path, fake_analyst, monkeypatch, capsys):
+    data = make_fragment('import torch\n')
+    assert run_analyst(monkeypatch, data) == 0
+    assert json.loads(capsys.readouterr().out)['generated_title'] == 'Topologia Emergente'
+    assert fake_analyst.built == 1
+
+    # A restart reuses the title instead of building the model again
+    assert run_analyst(monkeypatch, data) == 0
+    assert json.loads(capsys.readouterr().out)['generated_title'] == 'Topologia Emergente'
+    assert fake_analyst.built == 1
+
+    journal = PipelineJournal.for_repo(str(repo_path))
+    assert journal.stage_of(content_hash(data['file_content'])) == 'analyzed'
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+
+git = pytest.importorskip('git')
+
+import archivist as archivist_module
+from archivist import MemoryArchivist
+from journal import PipelineJournal, content_hash
+
+
+class Crash(BaseException):
+    """Simulates the process dying; escapes the archivist's error handling."""
+
+
+def crash(*args, **kwargs):
+    raise Crash()
+
+
+def crash_on_commit(monkeypatch):
+    """Crash when the archivist runs `git commit`, leaving other commands intact."""
+    call_process = git.Git._call_process
+
+    def patched(self, method, *args, **kwargs):
+        if method == 'commit':
+            raise Crash()
+        return call_process(self, method, *args, **kwargs)
+
+    monkeypatch.setattr(git.Git, '_call_process', patched)
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    repo = git.Repo.init(tmp_path)
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Test')
+        config.set_value('user', 'email', 'test@example.com')
+
+    index = tmp_path / 'memorie' / '_metadata' / 'index.json'
+    index.parent.mkdir(parents=True)
+    index.write_text('{"fragments": []}')
+    repo.index.add(['memorie/_metadata/index.json'])
+    repo.index.commit('baseline')
+    return tmp_path
+
+
+def make_fragment(content, title='Titolo'):
+    return {
+        'file_content': content,
+        'repo_url': 'https://github.com/example/repo',
+        'file_path': 'model.py',
+        'timestamp': '2024-01-01T00:00:00',
+        'search_keyword': 'pytorch',
+        'generated_title': title
+    }
+
+
+def commit_subjects(repo_path):
+    return [c.summary for c in git.Repo(repo_path).iter_commits()][:-1]
+
+
+def committed_index(repo_path):
+    blob = git.Repo(repo_path).head.commit.tree / 'memorie/_metadata/index.json'
+    return json.loads(blob.data_stream.read())['fragments']
+
+
+def test_store_fragment_commits_and_clears_journal(repo_path):
+    archivist = MemoryArchivist(str(repo_path))
+    data = make_fragment('import torch\n')
+
+    assert archivist.store_fragment(data)
+    assert commit_subjects(repo_path) == ['Frammento #1: Titolo']
+    assert committed_index(repo_path)[0]['hash'] == content_hash(data['file_content'])
+    assert PipelineJournal.for_repo(str(repo_path)).entries == {}
+
+    # Storing the same fragment again is a no-op
+    assert MemoryArchivist(str(repo_path)).store_fragment(data)
+    assert commit_subjects(repo_path) == ['Frammento #1: Titolo']
+
+
+@pytest.mark.parametrize('crash_point', [
+    'atomic_write_text',
+    'update_metadata_index',
+    'commit',
+    'finish_archival',
+])
+def test_store_fragment_resumes_after_crash(repo_path, monkeypatch, crash_point):
+    data = make_fragment('import torch\n')
+    archivist = MemoryArchivist(str(repo_path))
+    if crash_point == 'commit':
+        crash_on_commit(monkeypatch)
+    elif crash_point == 'atomic_write_text':
+        monkeypatch.setattr(archivist_module, crash_point, crash)
+    else:
+        monkeypatch.setattr(archivist, crash_point, crash)
+
+    with pytest.raises(Crash):
+        archivist.store_fragment(data)
+    monkeypatch.undo()
+
+    # The interrupted fragment is handed back by the scout on restart
+    resumed = PipelineJournal.for_repo(str(repo_path)).resume()
+    assert resumed['file_content'] == data['file_content']
+
+    archivist = MemoryArchivist(str(repo_path))
+    assert archivist.store_fragment(resumed)
+    assert commit_subjects(repo_path) == ['Frammento #1: Titolo']
+    assert [f['id'] for f in committed_index(repo_path)] == [1]
+    assert archivist.journal.unfinished() == []
+    assert not git.Repo(repo_path).is_dirty(untracked_files=False)
+
+
+def test_other_fragment_never_commits_interrupted_files(repo_path, monkeypatch):
+    first = make_fragment('import torch\n', 'Primo')
+    archivist = MemoryArchivist(str(repo_path))
+    crash_on_commit(monkeypatch)
+    with pytest.raises(Crash):
+        archivist.store_fragment(first)
+    monkeypatch.undo()
+
+    archivist = MemoryArchivist(str(repo_path))
+    assert archivist.store_fragment(make_fragment('import keras\n', 'Secondo'))
+    head = git.Repo(repo_path).head.commit
+    assert head.summary == 'Frammento #2: Secondo'
+    assert sorted(head.stats.files) == ['memorie/_metadata/index.json', 'memorie/python/frammento_0002.py']
+    assert [f['id'] for f in committed_index(repo_path)] == [2]
+
+    assert MemoryArchivist(str(repo_path)).store_fragment(first)
+    assert commit_subjects(repo_path) == ['Frammento #1: Primo', 'Frammento #2: Secondo']
+    assert [f['id'] for f in committed_index(repo_path)] == [1, 2]
+
+
+def test_get_next_id_skips_reserved_ids(repo_path):
+    with PipelineJournal.for_repo(str(repo_path)) as journal:
+        journal.record('a', 'archiving', {'fragment_id': 5})
+        journal.record('b', 'archiving', {'fragment_id': 7})
+        journal.record('b', 'failed')
+
+    # Only unfinished archivals hold on to their ID
+    assert MemoryArchivist(str(repo_path)).get_next_id() == 6
+
+
+def test_abandoned_fragment_is_discarded(repo_path, monkeypatch):
+    data = make_fragment('import torch\n')
+    archivist = MemoryArchivist(str(repo_path))
+    crash_on_commit(monkeypatch)
+    with pytest.raises(Crash):
+        archivist.store_fragment(data)
+    monkeypatch.undo()
+
+    with PipelineJournal.for_repo(str(repo_path)) as journal:
+        journal.record(content_hash(data['file_content']), 'failed')
+
+    # The abandoned fragment's ID is freed for the next one
+    archivist = MemoryArchivist(str(repo_path))
+    assert archivist.store_fragment(make_fragment('import keras\n', 'Secondo'))
+    assert 'import keras' in (repo_path / 'memorie' / 'python' / 'frammento_0001.py').read_text()
+    assert commit_subjects(repo_path) == ['Frammento #1: Secondo']
+    assert [f['id'] for f in committed_index(repo_path)] == [1]
+    assert not git.Repo(repo_path).is_dirty(untracked_files=False)
+
+    # Its path is forgotten, so the reused file is never cleaned up again
+    assert archivist.journal.data_of(content_hash(data['file_content'])) == {}
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+import journal as journal_module
+from journal import PipelineJournal, MAX_RESUME_ATTEMPTS, content_hash
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / 'journal.jsonl'
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def test_replay_skips_torn_trailing_record(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'scouted', {'file_content': 'x'}, durable=True)
+    with open(journal_path, 'a') as f:
+        f.write('{"hash": "b", "sta')
+
+    journal = PipelineJournal(journal_path)
+    assert journal.stage_of('a') == 'scouted'
+    assert journal.stage_of('b') is None
+
+    # The next record must not be glued onto the torn one
+    journal.record('c', 'scouted', durable=True)
+    assert PipelineJournal(journal_path).stage_of('c') == 'scouted'
+
+
+def test_stage_never_moves_backwards(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'archiving', {'fragment_id': 1})
+    journal.record('a', 'scouted', {'attempts': 1})
+    assert journal.stage_of('a') == 'archiving'
+    assert journal.data_of('a') == {'fragment_id': 1, 'attempts': 1}
+
+    journal.flush()
+    assert PipelineJournal(journal_path).stage_of('a') == 'archiving'
+
+
+def test_records_are_synced_in_batches(journal_path):
+    journal = PipelineJournal(journal_path, sync_every=3)
+    journal.record('a', 'scouted')
+    journal.record('b', 'scouted')
+    assert not journal_path.exists()
+
+    journal.record('c', 'scouted')
+    assert len(read_records(journal_path)) == 3
+
+    journal.record('d', 'scouted', durable=True)
+    assert len(read_records(journal_path)) == 4
+
+
+def test_creating_the_journal_syncs_its_directory(journal_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(journal_module, '_fsync_directory', synced.append)
+
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'archiving', {'fragment_id': 1}, durable=True)
+    journal.record('b', 'archiving', {'fragment_id': 2}, durable=True)
+    assert synced == [journal_path.parent]
+
+
+def test_closing_the_journal_flushes(journal_path):
+    with PipelineJournal(journal_path) as journal:
+        journal.record('a', 'analyzed', {'generated_title': 'T'})
+    assert PipelineJournal(journal_path).data_of('a') == {'generated_title': 'T'}
+
+
+def test_resume_abandons_fragment_after_max_attempts(journal_path):
+    journal = PipelineJournal(journal_path)
+    fragment_hash = content_hash('x')
+    journal.record(fragment_hash, 'scouted', {'file_content': 'x'})
+
+    for _ in range(MAX_RESUME_ATTEMPTS):
+        assert journal.resume() == {'file_content': 'x'}
+
+    assert journal.resume() is None
+    assert journal.stage_of(fragment_hash) == 'failed'
+    assert journal.unfinished() == []
+
+    # The abandoned content is compacted away
+    assert 'file_content' not in journal_path.read_text()
+
+
+def test_resume_picks_oldest_unfinished_fragment(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'archived')
+    journal.record('b', 'analyzed', {'file_content': 'b'})
+    journal.record('c', 'scouted', {'file_content': 'c'})
+    assert journal.resume() == {'file_content': 'b'}
+
+
+def test_resume_keeps_oldest_first_after_a_resume(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'scouted', {'file_content': 'a'})
+    journal.record('b', 'scouted', {'file_content': 'b'})
+
+    assert journal.resume() == {'file_content': 'a'}
+    assert journal.resume() == {'file_content': 'a'}
+
+    journal.compact()
+    assert PipelineJournal(journal_path).resume() == {'file_content': 'a'}
+
+
+def test_resume_returns_only_the_fragment_payload(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'analyzed', {'file_content': 'a', 'generated_title': 'T'})
+    journal.record('a', 'archiving', {'fragment_id': 1, 'archived_path': 'memorie/python/frammento_0001.py'})
+
+    assert journal.resume() == {'file_content': 'a', 'generated_title': 'T'}
+
+
+def test_compact_drops_archived_and_strips_failed(journal_path):
+    journal = PipelineJournal(journal_path)
+    journal.record('a', 'archiving', {'file_content': 'a', 'fragment_id': 1})
+    journal.record('a', 'archived')
+    journal.record('b', 'archiving', {'file_content': 'b', 'fragment_id': 2, 'archived_path': 'p'})
+    journal.record('b', 'failed')
+    journal.record('c', 'scouted', {'file_content': 'c'})
+    journal.compact()
+
+    records = read_records(journal_path)
+    assert {r['hash'] for r in records} == {'b', 'c'}
+    assert journal.data_of('b') == {'archived_path': 'p'}
+    assert journal.data_of('c') == {'file_content': 'c'}
+    assert journal.reserved_ids() == []
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+pytest.importorskip('github')
+
+import scout
+from journal import PipelineJournal, INDEX_PATH, content_hash
+
+
+@pytest.fixture
+def repo_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+    return tmp_path
+
+
+def make_result(content):
+    return {
+        'file_content': content,
+        'source_url': 'https://github.com/example/repo/blob/main/model.py',
+        'repo_url': 'https://github.com/example/repo',
+        'file_path': 'model.py',
+        'timestamp': '2024-01-01T00:00:00',
+        'search_keyword': 'pytorch'
+    }
+
+
+class FakeScout:
+    """Stands in for ScoutBot, recording how it was built and used."""
+    instances = []
+
+    def __init__(self, token, known_hashes=None):
+        self.known_hashes = known_hashes
+        self.excavated = False
+        FakeScout.instances.append(self)
+
+    def excavate(self):
+        self.excavated = True
+        return make_result('import torch\nclass Model: pass\n')
+
+
+@pytest.fixture
+def fake_scout(monkeypatch):
+    FakeScout.instances = []
+    monkeypatch.setattr(scout, 'ScoutBot', FakeScout)
+    return FakeScout
+
+
+def test_resumed_fragment_is_printed_without_searching(repo_path, fake_scout, capsys):
+    pending = make_result('import keras\n')
+    with PipelineJournal.for_repo(str(repo_path)) as journal:
+        journal.record(content_hash(pending['file_content']), 'scouted', pending)
+
+    assert scout.main() == 0
+    assert json.loads(capsys.readouterr().out) == pending
+    assert fake_scout.instances == []
+
+
+def test_new_fragment_is_journaled(repo_path, fake_scout, capsys):
+    assert scout.main() == 0
+    result = json.loads(capsys.readouterr().out)
+
+    journal = PipelineJournal.for_repo(str(repo_path))
+    assert journal.stage_of(content_hash(result['file_content'])) == 'scouted'
+
+
+def test_known_hashes_include_journal_and_index(repo_path, fake_scout):
+    with PipelineJournal.for_repo(str(repo_path)) as journal:
+        journal.record('abandoned', 'failed')
+    index = repo_path / INDEX_PATH
+    index.write_text(json.dumps({'fragments': [{'id': 1, 'hash': 'archived'}]}))
+
+    scout.main()
+    assert fake_scout.instances[0].known_hashes == {'abandoned', 'archived'}
+
+
+class FakeFile:
+    def __init__(self, content):
+        self.decoded_content = content.encode('utf-8')
+        self.html_url = 'https://github.com/example/repo/blob/main/model.py'
+        self.path = 'model.py'
+        self.repository = type('Repository', (), {'html_url': 'https://github.com/example/repo'})()
+
+
+class FakeResults(list):
+    @property
+    def totalCount(self):
+        return len(self)
+
+
+@pytest.mark.parametrize('known', [True, False])
+def test_search_code_skips_known_hashes(known):
+    content = 'import torch\n' + 'x = 1\n' * 20
+    known_hashes = {content_hash(content)} if known else set()
+    bot = scout.ScoutBot('token', known_hashes)
+    bot.github = type('FakeGithub', (), {'search_code': lambda self, query: FakeResults([FakeFile(content)])})()
+
+    result = bot.search_code('pytorch')
+    if known:
+        assert result is None
+    else:
+        assert result['file_content'] == content